@@ -1,17 +1,75 @@
+import asyncio
 import hashlib
 import hmac
 import os
 import secrets
-from datetime import datetime, timedelta, timezone
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, delete, event, func, inspect, select, update
+from sqlalchemy.orm import Session, make_transient_to_detached
 
 from .models import User, UserSession
 
+try:
+    # Optional: fastpbkdf2 keeps the keyed HMAC state across iterations and uses SHA-NI.
+    from fastpbkdf2 import pbkdf2_hmac as _pbkdf2_hmac
+except ImportError:
+    try:
+        # Call OpenSSL's PKCS5_PBKDF2_HMAC directly instead of going through the hashlib wrapper.
+        from _hashlib import pbkdf2_hmac as _pbkdf2_hmac
+    except ImportError:  # pragma: no cover
+        from hashlib import pbkdf2_hmac as _pbkdf2_hmac
+
 PBKDF2_ITERATIONS = int(os.getenv("PBKDF2_ITERATIONS", "210000"))
+# Optional wall-clock budget per hash; when set, iterations are calibrated to this host
+# (never below PBKDF2_ITERATIONS) and rounded to PBKDF2_ITERATION_STEP.
+PBKDF2_TARGET_MS = int(os.getenv("PBKDF2_TARGET_MS", "0"))
+PBKDF2_ITERATION_STEP = 10_000
+PASSWORD_HASH_ALGORITHM = "sha512"
+LEGACY_PASSWORD_HASH_ALGORITHM = "sha256"
 SESSION_TTL_HOURS = int(os.getenv("SESSION_TTL_HOURS", "24"))
+SESSION_TOKEN_BYTES = 48
+# token_urlsafe encodes without padding: 4 characters per 3 bytes.
+SESSION_TOKEN_LENGTH = -(-SESSION_TOKEN_BYTES * 4 // 3)
+# Sliding sessions: extend a session once less than a quarter of its TTL remains, so active
+# users stay signed in without a write on every request.
+SESSION_SLIDING_REFRESH = os.getenv("SESSION_SLIDING_REFRESH", "false").strip().lower() == "true"
+SESSION_SWEEP_INTERVAL_SECONDS = int(os.getenv("SESSION_SWEEP_INTERVAL_SECONDS", "300"))
 MIN_PASSWORD_LENGTH = int(os.getenv("MIN_PASSWORD_LENGTH", "12"))
+PASSWORD_VERIFY_CACHE_SECONDS = int(os.getenv("PASSWORD_VERIFY_CACHE_SECONDS", "300"))
+PASSWORD_VERIFY_CACHE_SIZE = int(os.getenv("PASSWORD_VERIFY_CACHE_SIZE", "1024"))
+SESSION_CACHE_SECONDS = int(os.getenv("SESSION_CACHE_SECONDS", "30"))
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "1024"))
+
+# Recent successful verifications, keyed by an HMAC under a per-process secret so
+# plaintext passwords never sit in memory. Failures are never cached.
+_VERIFY_CACHE_KEY = secrets.token_bytes(32)
+_VERIFY_CACHE: OrderedDict[bytes, float] = OrderedDict()
+_VERIFY_CACHE_LOCK = threading.Lock()
+
+# Resolved sessions, keyed by token hash: (user column values, monotonic deadline). An entry never
+# outlives its session; logout and user updates/deletes in this process drop it immediately, other
+# processes (extra web workers, the password reset CLI) are seen within SESSION_CACHE_SECONDS.
+_SESSION_CACHE: OrderedDict[bytes, tuple[dict, float]] = OrderedDict()
+_SESSION_CACHE_LOCK = threading.Lock()
+_USER_COLUMN_KEYS = tuple(attr.key for attr in inspect(User).column_attrs)
+
+_calibrated_iterations: int | None = None
+
+# Runs the async password hash/verify calls. PBKDF2 releases the GIL, so a pool sized to the
+# CPU count runs concurrent logins truly in parallel.
+_PBKDF2_POOL = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="pbkdf2")
+
+# Token hashing runs on every authenticated request. Copying a prepared SHA-256 state skips
+# OpenSSL context setup; the prefixed states also keep session and API token hashes from
+# being interchangeable.
+_SHA256_EMPTY_STATE = hashlib.sha256()
+_API_TOKEN_HASH_STATE = hashlib.sha256(b"api:")
+_SESSION_TOKEN_HASH_STATE = hashlib.sha256(b"session:")
 
 
 def hash_password(password: str, salt: str | None = None) -> tuple[str, str]:
@@ -20,63 +78,248 @@ def hash_password(password: str, salt: str | None = None) -> tuple[str, str]:
     if len(password) < MIN_PASSWORD_LENGTH:
         raise ValueError(f"Password must be at least {MIN_PASSWORD_LENGTH} characters")
 
-    actual_salt = salt or secrets.token_hex(16)
-    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), actual_salt.encode("utf-8"), PBKDF2_ITERATIONS)
-    return actual_salt, digest.hex()
+    salt_bytes = bytes.fromhex(salt) if salt else secrets.token_bytes(16)
+    iterations = pbkdf2_iterations()
+    digest = _pbkdf2_raw(PASSWORD_HASH_ALGORITHM, password.encode("utf-8"), salt_bytes, iterations)
+    return salt_bytes.hex(), f"pbkdf2_{PASSWORD_HASH_ALGORITHM}${iterations}${digest.hex()}"
+
+
+def pbkdf2_iterations() -> int:
+    global _calibrated_iterations
+    if PBKDF2_TARGET_MS <= 0:
+        return PBKDF2_ITERATIONS
+    # Calibrated lazily so OCR worker processes importing this module skip the benchmark.
+    if _calibrated_iterations is None:
+        _calibrated_iterations = _calibrate_pbkdf2_iterations(PBKDF2_TARGET_MS)
+    return _calibrated_iterations
+
+
+def _calibrate_pbkdf2_iterations(target_ms: int) -> int:
+    sample_iterations = PBKDF2_ITERATION_STEP
+    elapsed = float("inf")
+    for _ in range(3):
+        started = time.perf_counter()
+        _pbkdf2_hmac(PASSWORD_HASH_ALGORITHM, b"calibration", b"calibration-salt", sample_iterations)
+        elapsed = min(elapsed, time.perf_counter() - started)
+
+    scaled = sample_iterations * (target_ms / 1000.0) / max(elapsed, 1e-6)
+    quantized = max(1, round(scaled / PBKDF2_ITERATION_STEP)) * PBKDF2_ITERATION_STEP
+    return max(PBKDF2_ITERATIONS, quantized)
+
+
+def _pbkdf2_raw(algorithm: str, password_bytes: bytes, salt_bytes: bytes, iterations: int) -> bytes:
+    return _pbkdf2_hmac(algorithm, password_bytes, salt_bytes, iterations)
+
+
+def _parse_password_hash(stored_hash: str) -> tuple[str, int, str]:
+    # Tagged hashes look like "pbkdf2_sha512$<iterations>$<hex>" and use the hex-decoded salt.
+    # Untagged values are legacy PBKDF2-SHA256 digests over the salt's ASCII text, created
+    # with the configured iteration count.
+    parts = stored_hash.split("$")
+    if len(parts) == 3 and parts[0].startswith("pbkdf2_") and parts[1].isdigit():
+        return parts[0].removeprefix("pbkdf2_"), int(parts[1]), parts[2]
+    return LEGACY_PASSWORD_HASH_ALGORITHM, PBKDF2_ITERATIONS, stored_hash
+
+
+def _verify_cache_key(password_bytes: bytes, salt_bytes: bytes, expected_hash: str) -> bytes:
+    message = b"\0".join((salt_bytes, expected_hash.encode("utf-8"), password_bytes))
+    return hmac.digest(_VERIFY_CACHE_KEY, message, "sha256")
+
+
+def _verify_cache_hit(cache_key: bytes) -> bool:
+    now = time.monotonic()
+    with _VERIFY_CACHE_LOCK:
+        expires_at = _VERIFY_CACHE.get(cache_key)
+        if expires_at is None:
+            return False
+        if expires_at < now:
+            del _VERIFY_CACHE[cache_key]
+            return False
+        _VERIFY_CACHE.move_to_end(cache_key)
+        return True
+
+
+def _verify_cache_store(cache_key: bytes) -> None:
+    with _VERIFY_CACHE_LOCK:
+        _VERIFY_CACHE[cache_key] = time.monotonic() + PASSWORD_VERIFY_CACHE_SECONDS
+        _VERIFY_CACHE.move_to_end(cache_key)
+        while len(_VERIFY_CACHE) > PASSWORD_VERIFY_CACHE_SIZE:
+            _VERIFY_CACHE.popitem(last=False)
 
 
 def verify_password(password: str, salt: str, expected_hash: str) -> bool:
-    _, computed = hash_password(password, salt)
-    return hmac.compare_digest(computed, expected_hash)
+    if not password or not expected_hash:
+        return False
+
+    password_bytes = password.encode("utf-8")
+    use_cache = PASSWORD_VERIFY_CACHE_SECONDS > 0 and PASSWORD_VERIFY_CACHE_SIZE > 0
+    cache_key = _verify_cache_key(password_bytes, salt.encode("utf-8"), expected_hash) if use_cache else b""
+    if use_cache and _verify_cache_hit(cache_key):
+        return True
+
+    algorithm, iterations, expected_hex = _parse_password_hash(expected_hash)
+    try:
+        expected_digest = bytes.fromhex(expected_hex)
+        salt_bytes = salt.encode("utf-8") if algorithm == LEGACY_PASSWORD_HASH_ALGORITHM else bytes.fromhex(salt)
+    except ValueError:
+        return False
+    digest = _pbkdf2_raw(algorithm, password_bytes, salt_bytes, iterations)
+    matched = hmac.compare_digest(digest, expected_digest)
+    if matched and use_cache:
+        _verify_cache_store(cache_key)
+    return matched
+
+
+async def hash_password_async(password: str, salt: str | None = None) -> tuple[str, str]:
+    return await asyncio.get_running_loop().run_in_executor(_PBKDF2_POOL, hash_password, password, salt)
 
 
+async def verify_password_async(password: str, salt: str, expected_hash: str) -> bool:
+    return await asyncio.get_running_loop().run_in_executor(_PBKDF2_POOL, verify_password, password, salt, expected_hash)
 
 
-def hash_api_token(raw_token: str) -> str:
-    return hashlib.sha256(raw_token.encode("utf-8")).hexdigest()
+def password_needs_rehash(stored_hash: str) -> bool:
+    algorithm, iterations, _ = _parse_password_hash(stored_hash)
+    # Only upgrade: hashes stronger than the current setting are left alone.
+    return algorithm != PASSWORD_HASH_ALGORITHM or iterations < pbkdf2_iterations()
 
-def hash_session_token(raw_token: str) -> str:
-    return hashlib.sha256(raw_token.encode("utf-8")).hexdigest()
+
+
+def hash_api_token(raw_token: str) -> bytes:
+    hasher = _API_TOKEN_HASH_STATE.copy()
+    hasher.update(raw_token.encode("utf-8"))
+    return hasher.digest()
+
+
+def hash_legacy_api_token(raw_token: str) -> bytes:
+    # Tokens issued before hashes were domain-separated; rehashed on first use.
+    hasher = _SHA256_EMPTY_STATE.copy()
+    hasher.update(raw_token.encode("utf-8"))
+    return hasher.digest()
+
+
+def hash_session_token(raw_token: str) -> bytes:
+    hasher = _SESSION_TOKEN_HASH_STATE.copy()
+    hasher.update(raw_token.encode("utf-8"))
+    return hasher.digest()
+
+
+# Built once at import so the hot session paths reuse the same compiled statement.
+# One round trip: session match, expiry and active-user check happen in SQL.
+# Expired rows are left for purge_expired_sessions.
+_USER_BY_SESSION_TOKEN = (
+    select(
+        User,
+        (UserSession.expires_at < func.now() + timedelta(hours=SESSION_TTL_HOURS / 4)).label("needs_refresh"),
+        func.extract("epoch", UserSession.expires_at - func.now()).label("expires_in"),
+    )
+    .join(UserSession, UserSession.user_id == User.id)
+    .where(
+        UserSession.token_hash == bindparam("token_hash"),
+        UserSession.expires_at > func.now(),
+        User.is_active == True,
+    )
+)
+_REFRESH_SESSION_BY_TOKEN = (
+    update(UserSession)
+    .where(UserSession.token_hash == bindparam("session_token_hash"))
+    .values(expires_at=func.now() + timedelta(hours=SESSION_TTL_HOURS))
+)
+_DELETE_SESSION_BY_TOKEN = delete(UserSession).where(UserSession.token_hash == bindparam("token_hash"))
 
 
 def create_session(db: Session, user_id: int) -> str:
-    raw_token = secrets.token_urlsafe(48)
+    raw_token = secrets.token_urlsafe(SESSION_TOKEN_BYTES)
     token_hash = hash_session_token(raw_token)
-    expires_at = datetime.now(timezone.utc) + timedelta(hours=SESSION_TTL_HOURS)
-
-    db.add(UserSession(user_id=user_id, token_hash=token_hash, expires_at=expires_at))
+    # expires_at comes from the column's server default (now() + SESSION_TTL_HOURS), so the
+    # database clock sets it, the same one the session lookup compares against.
+    db.add(UserSession(user_id=user_id, token_hash=token_hash))
     db.commit()
     return raw_token
 
 
+def purge_expired_sessions(db: Session) -> int:
+    result = db.execute(delete(UserSession).where(UserSession.expires_at < func.now()))
+    db.commit()
+    return result.rowcount or 0
+
+
 def delete_session(db: Session, raw_token: str | None) -> None:
-    if not raw_token:
+    if not raw_token or len(raw_token) != SESSION_TOKEN_LENGTH:
         return
 
     token_hash = hash_session_token(raw_token)
-    session = db.scalar(select(UserSession).where(UserSession.token_hash == token_hash))
-    if session is not None:
-        db.delete(session)
+    with _SESSION_CACHE_LOCK:
+        _SESSION_CACHE.pop(token_hash, None)
+    result = db.execute(_DELETE_SESSION_BY_TOKEN, {"token_hash": token_hash})
+    if result.rowcount:
         db.commit()
 
 
+def forget_cached_sessions(user_id: int | None = None) -> None:
+    """Drop cached session lookups for one user, or for everyone when ``user_id`` is None."""
+    with _SESSION_CACHE_LOCK:
+        if user_id is None:
+            _SESSION_CACHE.clear()
+            return
+        stale = [key for key, (values, _) in _SESSION_CACHE.items() if values["id"] == user_id]
+        for key in stale:
+            del _SESSION_CACHE[key]
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _forget_sessions_of_changed_user(mapper, connection, target: User) -> None:
+    forget_cached_sessions(target.id)
+
+
+def _session_cache_get(token_hash: bytes) -> dict | None:
+    now = time.monotonic()
+    with _SESSION_CACHE_LOCK:
+        entry = _SESSION_CACHE.get(token_hash)
+        if entry is None:
+            return None
+        values, expires_at = entry
+        if expires_at <= now:
+            del _SESSION_CACHE[token_hash]
+            return None
+        _SESSION_CACHE.move_to_end(token_hash)
+        return values
+
+
+def _session_cache_store(token_hash: bytes, user: User, session_expires_in: float) -> None:
+    values = {key: getattr(user, key) for key in _USER_COLUMN_KEYS}
+    expires_at = time.monotonic() + min(SESSION_CACHE_SECONDS, session_expires_in)
+    with _SESSION_CACHE_LOCK:
+        _SESSION_CACHE[token_hash] = (values, expires_at)
+        _SESSION_CACHE.move_to_end(token_hash)
+        while len(_SESSION_CACHE) > SESSION_CACHE_SIZE:
+            _SESSION_CACHE.popitem(last=False)
+
+
 def get_user_by_session_token(db: Session, raw_token: str | None) -> User | None:
-    if not raw_token:
+    # Anything create_session could not have issued is a guaranteed miss; skip hash and query.
+    if not raw_token or len(raw_token) != SESSION_TOKEN_LENGTH:
         return None
 
     token_hash = hash_session_token(raw_token)
-    session = db.scalar(select(UserSession).where(UserSession.token_hash == token_hash))
-    if session is None:
-        return None
+    use_cache = SESSION_CACHE_SECONDS > 0 and SESSION_CACHE_SIZE > 0
+    if use_cache:
+        cached = _session_cache_get(token_hash)
+        if cached is not None:
+            # Rebuild the row as a clean persistent instance so callers can still modify and commit it.
+            user = User(**cached)
+            make_transient_to_detached(user)
+            return db.merge(user, load=False)
 
-    now = datetime.now(timezone.utc)
-    expires_at = session.expires_at
-    if expires_at.tzinfo is None:
-        expires_at = expires_at.replace(tzinfo=timezone.utc)
-
-    if expires_at < now:
-        db.delete(session)
-        db.commit()
+    row = db.execute(_USER_BY_SESSION_TOKEN, {"token_hash": token_hash}).first()
+    if row is None:
         return None
 
-    return db.scalar(select(User).where(User.id == session.user_id, User.is_active == True))
+    user, needs_refresh, expires_in = row
+    if use_cache:
+        _session_cache_store(token_hash, user, float(expires_in))
+    if SESSION_SLIDING_REFRESH and needs_refresh:
+        db.execute(_REFRESH_SESSION_BY_TOKEN, {"session_token_hash": token_hash})
+        db.commit()
+    return user
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Date, DateTime, ForeignKey, Integer, Numeric, Text, func
+from sqlalchemy import Boolean, CheckConstraint, Date, DateTime, ForeignKey, Index, Integer, LargeBinary, Numeric, Text, func, text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from .database import Base
@@ -30,13 +30,18 @@ class ReceiptImage(Base):
 
 class UploadJob(Base):
     __tablename__ = "upload_jobs"
+    # Workers only look for queued/processing jobs; a partial index stays tiny as finished jobs pile up.
+    __table_args__ = (
+        Index("ix_upload_jobs_pending", "id", postgresql_where=text("status IN ('queued', 'processing')")),
+        CheckConstraint("status IN ('queued', 'processing', 'completed', 'failed')", name="ck_upload_jobs_status"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
-    status: Mapped[str] = mapped_column(Text, nullable=False, server_default="queued", index=True)
+    status: Mapped[str] = mapped_column(Text, nullable=False, server_default="queued")
     original_filename: Mapped[str] = mapped_column(Text, nullable=False)
     stored_filename: Mapped[str] = mapped_column(Text, nullable=False)
     content_type: Mapped[str | None] = mapped_column(Text, nullable=True)
-    file_sha256: Mapped[str | None] = mapped_column(Text, nullable=True, index=True)
+    file_sha256: Mapped[bytes | None] = mapped_column(LargeBinary(32), nullable=True, index=True)
     created_by_user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     receipt_id: Mapped[int | None] = mapped_column(ForeignKey("receipts.id", ondelete="SET NULL"), nullable=True, index=True)
     error_message: Mapped[str | None] = mapped_column(Text, nullable=True)
@@ -62,7 +67,7 @@ class ApiToken(Base):
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     name: Mapped[str] = mapped_column(Text, nullable=False)
     scope: Mapped[str] = mapped_column(Text, nullable=False, server_default="upload")
-    token_hash: Mapped[str] = mapped_column(Text, nullable=False, unique=True, index=True)
+    token_hash: Mapped[bytes] = mapped_column(LargeBinary(32), nullable=False, unique=True, index=True)
     token_prefix: Mapped[str] = mapped_column(Text, nullable=False)
     created_by_user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), index=True, nullable=False)
     revoked: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default="false")
@@ -85,11 +90,18 @@ class User(Base):
 
 class UserSession(Base):
     __tablename__ = "user_sessions"
+    # Covering index: the auth lookup is answered from the index without touching the heap.
+    __table_args__ = (
+        Index("ix_user_sessions_auth", "token_hash", unique=True, postgresql_include=["expires_at", "user_id"]),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), index=True, nullable=False)
-    token_hash: Mapped[str] = mapped_column(Text, nullable=False, unique=True, index=True)
-    expires_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), nullable=False)
+    token_hash: Mapped[bytes] = mapped_column(LargeBinary(32), nullable=False)
+    # The default is re-set from SESSION_TTL_HOURS on startup (see _ensure_schema).
+    expires_at: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True), nullable=False, index=True, server_default=text("now() + interval '24 hours'")
+    )
     created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
 
@@ -1,9 +1,12 @@
+import errno
 import io
 import json
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
 from decimal import Decimal, InvalidOperation
+from pathlib import Path
 
 import pytesseract
 
@@ -25,6 +28,17 @@ DATE_PATTERNS = [
 ]
 
 AMOUNT_TOKEN_PATTERN = re.compile(r"(\$?\s*[0-9]+(?:\.[0-9]{2}))(\s*%)?")
+# Extraction heuristics run these per OCR line; compiled once instead of per call.
+AMOUNT_WORD_PATTERN = re.compile(r"\b\d+\.\d{2}\b")
+DECIMAL_COMMA_PATTERN = re.compile(r"(\d),(\d{2})(?!\d)")
+NON_NUMERIC_PATTERN = re.compile(r"[^0-9.]")
+NON_ALNUM_PATTERN = re.compile(r"[^a-z0-9]+")
+LEADING_SYMBOLS_PATTERN = re.compile(r"^[^A-Za-z0-9]+")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+REPEATED_CHAR_PATTERN = re.compile(r"(.)\1\1")
+ZIP_CODE_PATTERN = re.compile(r"\b\d{5}(?:-\d{4})?\b")
+TORCHYS_PATTERN = re.compile(r"\btorchy'?s?\b")
+LOVES_PATTERN = re.compile(r"\blowe'?s?\b")
 COMMON_DIGIT_FIXES = str.maketrans({"O": "0", "o": "0", "I": "1", "l": "1", "S": "5", "B": "8"})
 MAX_PDF_OCR_PAGES = 4
 OCR_AUTO_CROP = os.getenv("OCR_AUTO_CROP", "true").strip().lower() == "true"
@@ -36,6 +50,10 @@ OCR_FAST_MODE = os.getenv("OCR_FAST_MODE", "true").strip().lower() == "true"
 OCR_MAX_IMAGE_SIDE = int(os.getenv("OCR_MAX_IMAGE_SIDE", "2600"))
 OCR_TESS_TIMEOUT_SEC = int(os.getenv("OCR_TESS_TIMEOUT_SEC", "10"))
 OCR_OSD_TIMEOUT_SEC = int(os.getenv("OCR_OSD_TIMEOUT_SEC", "3"))
+OCR_PDF_PAGE_WORKERS = int(os.getenv("OCR_PDF_PAGE_WORKERS", "2"))
+# Rendered pages are mostly flat white; zlib level 1 compresses them nearly as well as the
+# default 6 at a fraction of the encode time.
+PDF_PAGE_PNG_COMPRESS_LEVEL = 1
 def write_ocr_debug_report(path: str, payload: dict) -> None:
     try:
         with open(path, "w", encoding="utf-8") as f:
@@ -44,13 +62,27 @@ def write_ocr_debug_report(path: str, payload: dict) -> None:
         pass
 
 
+def is_transient_ocr_error(exc: BaseException) -> bool:
+    """True for failures a retry can plausibly fix (resource pressure), not bad input."""
+    if isinstance(exc, RuntimeError) and "timeout" in str(exc).lower():
+        # pytesseract kills the process on its own timeout and raises RuntimeError, not TimeoutError.
+        return True
+    if isinstance(exc, OSError):
+        # Could not spawn tesseract: out of processes, memory or file descriptors.
+        return exc.errno in {errno.EAGAIN, errno.ENOMEM, errno.EMFILE, errno.ENFILE}
+    if isinstance(exc, pytesseract.TesseractError):
+        # Negative status means tesseract was killed by a signal (typically the OOM killer).
+        return isinstance(exc.status, int) and exc.status < 0
+    return False
+
+
 def _ocr_quality_score(text: str, avg_conf: float) -> float:
     low = (text or "").lower()
     letters = sum(ch.isalpha() for ch in low)
     digits = sum(ch.isdigit() for ch in low)
     keywords = ("total", "tax", "subtotal", "amount", "visa", "mastercard", "cashier", "order")
     hits = sum(1 for k in keywords if k in low)
-    amount_hits = len(re.findall(r"\b\d+\.\d{2}\b", low))
+    amount_hits = len(AMOUNT_WORD_PATTERN.findall(low))
 
     score = float(avg_conf or 0.0)
     score += min(35.0, letters / 55.0)
@@ -217,11 +249,18 @@ def run_ocr_pdf(pdf_bytes: bytes, fast_mode: bool | None = None) -> dict:
     if not pages:
         raise ValueError("PDF contains no renderable pages")
 
-    per_page_results: list[dict] = []
-    for page_image in pages:
+    def ocr_page(page_image: Image.Image) -> dict:
         page_buffer = io.BytesIO()
-        page_image.save(page_buffer, format="PNG")
-        per_page_results.append(run_ocr(page_buffer.getvalue(), fast_mode=fast_mode))
+        page_image.save(page_buffer, format="PNG", compress_level=PDF_PAGE_PNG_COMPRESS_LEVEL)
+        return run_ocr(page_buffer.getvalue(), fast_mode=fast_mode)
+
+    # Pages are independent and the heavy lifting (tesseract subprocess, OpenCV, PIL) releases the GIL.
+    page_workers = min(len(pages), max(1, OCR_PDF_PAGE_WORKERS))
+    if page_workers == 1:
+        per_page_results = [ocr_page(page_image) for page_image in pages]
+    else:
+        with ThreadPoolExecutor(max_workers=page_workers) as executor:
+            per_page_results = list(executor.map(ocr_page, pages))
 
     text_parts = [result.get("text", "") for result in per_page_results if result.get("text")]
     all_lines = [line for result in per_page_results for line in result.get("lines", [])]
@@ -243,21 +282,32 @@ def run_ocr_pdf(pdf_bytes: bytes, fast_mode: bool | None = None) -> dict:
     }
 
 
-def render_pdf_preview_image(pdf_bytes: bytes, page_index: int = 0) -> bytes:
+def render_pdf_preview_image(pdf_source: bytes | str | Path, page_index: int = 0) -> bytes:
     if page_index < 0:
         raise ValueError("page_index must be >= 0")
 
-    pages = _render_pdf_pages(pdf_bytes, max_pages=page_index + 1)
-    if not pages or page_index >= len(pages):
+    pages = _render_pdf_pages(pdf_source, max_pages=1, first_page=page_index)
+    if not pages:
         raise ValueError("PDF page is out of range")
 
     preview = io.BytesIO()
-    pages[page_index].save(preview, format="PNG")
+    pages[0].save(preview, format="PNG", compress_level=PDF_PAGE_PNG_COMPRESS_LEVEL)
     return preview.getvalue()
 
 
-def get_pdf_page_count(pdf_bytes: bytes) -> int:
-    document = pdfium.PdfDocument(pdf_bytes)
+def render_pdf_preview_images(pdf_source: bytes | str | Path, max_pages: int) -> list[bytes]:
+    previews: list[bytes] = []
+    for page in _render_pdf_pages(pdf_source, max_pages=max_pages):
+        preview = io.BytesIO()
+        page.save(preview, format="PNG", compress_level=PDF_PAGE_PNG_COMPRESS_LEVEL)
+        previews.append(preview.getvalue())
+    return previews
+
+
+def get_pdf_page_count(pdf_source: bytes | str | Path) -> int:
+    # pdfium opens paths natively (reading pages on demand), so callers with a file on disk
+    # should pass the path rather than read_bytes().
+    document = pdfium.PdfDocument(pdf_source)
     try:
         return int(len(document))
     finally:
@@ -266,13 +316,13 @@ def get_pdf_page_count(pdf_bytes: bytes) -> int:
             close_document()
 
 
-def _render_pdf_pages(pdf_bytes: bytes, *, max_pages: int) -> list[Image.Image]:
-    document = pdfium.PdfDocument(pdf_bytes)
+def _render_pdf_pages(pdf_source: bytes | str | Path, *, max_pages: int, first_page: int = 0) -> list[Image.Image]:
+    document = pdfium.PdfDocument(pdf_source)
     rendered_pages: list[Image.Image] = []
 
     try:
-        page_count = min(len(document), max_pages)
-        for index in range(page_count):
+        last_page = min(len(document), first_page + max_pages)
+        for index in range(first_page, last_page):
             page = document[index]
             bitmap = None
             try:
@@ -367,8 +417,8 @@ def _normalize_merchant_candidate(merchant: str | None, lines: list[str]) -> str
     if not merchant:
         return None
 
-    cleaned = re.sub(r"^[^A-Za-z0-9]+", "", merchant).strip()
-    cleaned = re.sub(r"\s+", " ", cleaned)
+    cleaned = LEADING_SYMBOLS_PATTERN.sub("", merchant).strip()
+    cleaned = WHITESPACE_PATTERN.sub(" ", cleaned)
     if not cleaned:
         return None
 
@@ -381,9 +431,9 @@ def _normalize_merchant_candidate(merchant: str | None, lines: list[str]) -> str
         return "Costco Wholesale"
     if "dallas #1266" in low_blob and ("churchill" in low_blob or "churchi" in low_blob):
         return "Costco Wholesale"
-    if re.search(r"\btorchy'?s?\b", low_blob):
+    if TORCHYS_PATTERN.search(low_blob):
         return "Torchy's Tacos"
-    if re.search(r"\blowe'?s?\b", low_blob) or "love's" in low_blob or "loves.com" in low_blob:
+    if LOVES_PATTERN.search(low_blob) or "love's" in low_blob or "loves.com" in low_blob:
         return "Love's"
 
     # If OCR picks short/noisy fragments, prefer explicit store labels.
@@ -409,14 +459,14 @@ def _normalize_merchant_candidate(merchant: str | None, lines: list[str]) -> str
                 continue
             if ":" in l:
                 continue
-            if re.search(r"\btorchy'?s?\b", ll):
+            if TORCHYS_PATTERN.search(ll):
                 return "Torchy's Tacos"
-            if re.search(r"\blowe'?s?\b", ll) or "loves.com" in ll:
+            if LOVES_PATTERN.search(ll) or "loves.com" in ll:
                 return "Love's"
             alpha = sum(ch.isalpha() for ch in l)
             digits = sum(ch.isdigit() for ch in l)
             if alpha >= 4 and digits <= 3:
-                cleaned_line = re.sub(r"^[^A-Za-z0-9]+", "", l).strip()
+                cleaned_line = LEADING_SYMBOLS_PATTERN.sub("", l).strip()
                 if cleaned_line:
                     return cleaned_line[:200]
 
@@ -425,7 +475,7 @@ def _normalize_merchant_candidate(merchant: str | None, lines: list[str]) -> str
     if alpha < 3 or digits > 6:
         return None
 
-    noisy = re.search(r"(.)\1\1", cleaned) is not None
+    noisy = REPEATED_CHAR_PATTERN.search(cleaned) is not None
     noisy = noisy or (sum(1 for ch in cleaned if not ch.isalnum() and not ch.isspace()) / max(1, len(cleaned)) > 0.2)
     if noisy:
         # Prefer top-of-receipt fallback lines over OCR noise.
@@ -456,13 +506,14 @@ def parse_merchant(lines: list[str], line_confidences: dict[str, float]) -> tupl
     address_tokens = {"st", "street", "ave", "avenue", "rd", "road", "blvd", "lane", "ln", "way", "dr", "drive", "tx", "ca", "fl", "ny", "zip"}
 
     # Prefer known brand lines immediately.
+    has_wholesale = "wholesale" in " ".join(lines[:10]).lower()
     for line in lines[:16]:
         ll = line.lower()
-        if re.search(r"\btorchy'?s?\b", ll):
+        if TORCHYS_PATTERN.search(ll):
             return "Torchy's Tacos", _line_confidence(line, line_confidences)
-        if "costco" in ll and "wholesale" in " ".join(lines[:10]).lower():
+        if "costco" in ll and has_wholesale:
             return "Costco Wholesale", _line_confidence(line, line_confidences)
-        if re.search(r"\blowe'?s?\b", ll) or "loves.com" in ll:
+        if LOVES_PATTERN.search(ll) or "loves.com" in ll:
             return "Love's", _line_confidence(line, line_confidences)
 
     best_line: str | None = None
@@ -484,13 +535,13 @@ def parse_merchant(lines: list[str], line_confidences: dict[str, float]) -> tupl
         if alpha < 3 or digits > 6:
             continue
 
-        words = [w for w in re.split(r"\s+", low) if w]
+        words = [w for w in WHITESPACE_PATTERN.split(low) if w]
         if not words:
             continue
 
         if any(w in address_tokens for w in words):
             continue
-        if re.search(r"\b\d{5}(?:-\d{4})?\b", raw):
+        if ZIP_CODE_PATTERN.search(raw):
             continue
 
         score = 0.0
@@ -500,7 +551,7 @@ def parse_merchant(lines: list[str], line_confidences: dict[str, float]) -> tupl
 
         if len(raw) > 28:
             score -= min(24.0, (len(raw) - 28) * 1.0)
-        if re.search(r"(.)\1\1", raw):
+        if REPEATED_CHAR_PATTERN.search(raw):
             score -= 18.0
 
         symbol_ratio = sum(1 for ch in raw if not ch.isalnum() and not ch.isspace()) / max(1, len(raw))
@@ -679,14 +730,14 @@ def _safe_parse_date(value: str) -> date | None:
 
 def _extract_amount_candidates(line: str) -> list[dict]:
     normalized = _normalize_digits(line)
-    normalized = re.sub(r"(\d),(\d{2})(?!\d)", r"\1.\2", normalized)
+    normalized = DECIMAL_COMMA_PATTERN.sub(r"\1.\2", normalized)
     candidates: list[dict] = []
 
     for match in AMOUNT_TOKEN_PATTERN.finditer(normalized):
         token = match.group(1)
         percent_suffix = match.group(2)
 
-        numeric_token = re.sub(r"[^0-9.]", "", token)
+        numeric_token = NON_NUMERIC_PATTERN.sub("", token)
         if not numeric_token:
             continue
 
@@ -749,7 +800,7 @@ def _normalize_digits(value: str) -> str:
 def _normalize_lines(text: str) -> list[str]:
     cleaned: list[str] = []
     for line in text.splitlines():
-        compact = re.sub(r"\s+", " ", line).strip()
+        compact = WHITESPACE_PATTERN.sub(" ", line).strip()
         if compact:
             cleaned.append(compact)
     return cleaned
@@ -827,7 +878,7 @@ def _line_confidence(line: str, line_confidences: dict[str, float]) -> float:
 
 
 def _normalize_for_match(value: str) -> str:
-    return re.sub(r"[^a-z0-9]+", "", value.lower())
+    return NON_ALNUM_PATTERN.sub("", value.lower())
 
 
 def _build_line_confidence_map(lines: list[dict]) -> dict[str, float]:
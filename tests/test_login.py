@@ -0,0 +1,59 @@
+"""Login smoke tests. Importing app.main runs the Postgres schema setup, so these need a real database:
+
+    DATABASE_URL=postgresql://... python -m pytest tests
+"""
+import os
+import secrets
+
+import pytest
+
+if not os.getenv("DATABASE_URL", "").startswith("postgresql"):
+    pytest.skip("DATABASE_URL must point at a Postgres database", allow_module_level=True)
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app import main  # noqa: E402
+from app.auth import hash_password  # noqa: E402
+from app.database import SessionLocal  # noqa: E402
+from app.models import LoginRateLimit, User  # noqa: E402
+
+PASSWORD = "correct horse battery"
+
+
+@pytest.fixture
+def username():
+    name = f"smoke_{secrets.token_hex(4)}"
+    salt, password_hash = hash_password(PASSWORD)
+    with SessionLocal() as db:
+        db.add(User(username=name, password_salt=salt, password_hash=password_hash, role="view"))
+        db.commit()
+    yield name
+    with SessionLocal() as db:
+        db.query(LoginRateLimit).filter(LoginRateLimit.key.endswith(f":{name}")).delete(synchronize_session=False)
+        db.query(User).filter(User.username == name).delete(synchronize_session=False)
+        db.commit()
+
+
+@pytest.fixture
+def client():
+    return TestClient(main.app)
+
+
+def test_login_accepts_valid_credentials(client, username):
+    resp = client.post("/auth/login", json={"username": username, "password": PASSWORD})
+    assert resp.status_code == 200
+
+
+def test_login_rejects_wrong_password(client, username):
+    resp = client.post("/auth/login", json={"username": username, "password": "wrong password"})
+    assert resp.status_code == 401
+
+
+def test_login_blocks_after_repeated_failures(client, username, monkeypatch):
+    monkeypatch.setattr(main, "LOGIN_RATE_LIMIT_ATTEMPTS", 2)
+    for _ in range(2):
+        assert client.post("/auth/login", json={"username": username, "password": "wrong password"}).status_code == 401
+    resp = client.post("/auth/login", json={"username": username, "password": PASSWORD})
+    assert resp.status_code == 429
+    assert int(resp.headers["Retry-After"]) > 0